@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, request, abort, g
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -6,9 +6,10 @@ import os
 import json
 import time
 from datetime import datetime
-import uuid
 import logging
 import socket
+from dashboard import Dashboard
+from encoder import ResponseEncoder
 
 # Configure logging for Render
 logging.basicConfig(
@@ -19,6 +20,7 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
+response_encoder = ResponseEncoder(app)
 
 # Rate Limiter - Render compatible
 limiter = Limiter(
@@ -38,6 +40,9 @@ ARES_CONFIG = {
     "contact": "operations@ares-intel.com",
 }
 
+# Dashboard is compiled once at startup and served as static assets
+dashboard = Dashboard(os.path.join(app.root_path, 'index.html'), ARES_CONFIG)
+
 # Initialize scraper with error handling
 try:
     from scraper import InstagramScraper
@@ -58,7 +63,13 @@ except Exception as e:
     PROXY_MANAGER_AVAILABLE = False
 
 def generate_mission_id():
-    return f"ARES-MISSION-{int(time.time())}-{uuid.uuid4().hex[:6].upper()}"
+    return f"ARES-MISSION-{int(time.time())}-{os.urandom(3).hex().upper()}"
+
+def request_timestamp():
+    """UTC timestamp for the current request, formatted once"""
+    if 'timestamp' not in g:
+        g.timestamp = datetime.utcnow().isoformat() + "Z"
+    return g.timestamp
 
 def get_client_ip():
     """Get client IP address from request"""
@@ -81,39 +92,45 @@ def get_client_user_agent():
 
 def ares_response(data=None, success=True, message="", code=200, client_ip=None):
     """Standardized Ares API response"""
-    response = {
-        "meta": {
-            "success": success,
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "mission_id": generate_mission_id(),
-            "version": ARES_CONFIG["version"],
-            "platform": ARES_CONFIG["name"],
-            "client_ip_used": client_ip or "system_ip"
-        }
+    meta = {
+        "success": success,
+        "timestamp": request_timestamp(),
+        "mission_id": generate_mission_id(),
+        "version": ARES_CONFIG["version"],
+        "platform": ARES_CONFIG["name"],
+        "client_ip_used": client_ip or "system_ip"
     }
     
     if message:
-        response["meta"]["message"] = message
-    
-    if data is not None:
-        response["data"] = data
+        meta["message"] = message
     
     if not success:
-        response["meta"]["code"] = f"ARES-{code}"
+        meta["code"] = f"ARES-{code}"
     
-    return jsonify(response), code
+    return response_encoder.response(meta, data), code
 
 @app.route('/')
+@limiter.exempt
 def home():
-    """Dashboard"""
+    """Dashboard shell (static, status is loaded from /api/v1/dashboard)"""
+    return dashboard.serve_index(request)
+
+@app.route('/assets/<path:filename>')
+@limiter.exempt
+def dashboard_asset(filename):
+    """Content-hashed dashboard assets"""
+    response = dashboard.serve_asset(request, filename)
+    if response is None:
+        abort(404)
+    return response
+
+@app.route('/api/v1/dashboard', methods=['GET'])
+@limiter.exempt
+def dashboard_status():
+    """Cheap status for the dashboard (no upstream calls, no shared state writes)"""
     client_ip = get_client_ip()
-    user_agent = get_client_user_agent()
-    
-    # Add client IP to proxy pool if available
-    if PROXY_MANAGER_AVAILABLE:
-        proxy_manager.add_user_ip(client_ip, user_agent)
     
-    system_status = {
+    status_data = {
         "scraper": SCRAPER_AVAILABLE,
         "proxy_manager": PROXY_MANAGER_AVAILABLE,
         "your_ip": client_ip,
@@ -121,7 +138,11 @@ def home():
         "status": "OPERATIONAL" if SCRAPER_AVAILABLE else "DEGRADED"
     }
     
-    return render_template('index.html', brand=ARES_CONFIG, status=system_status)
+    return ares_response(
+        data=status_data,
+        message="Dashboard status",
+        client_ip=client_ip
+    )
 
 @app.route('/api/v1/lookup/<username>', methods=['GET'])
 @limiter.limit("15 per minute")
@@ -202,9 +223,9 @@ def lookup_user(username):
             "target": {
                 "username": username,
                 "url": f"https://instagram.com/{username}",
-                "extracted_at": datetime.utcnow().isoformat() + "Z"
+                "extracted_at": request_timestamp()
             },
-            "profile": scraped_data.get('profile', {}),
+            "profile": scraped_data.get('profile_json') or scraped_data.get('profile', {}),
             "extraction_info": {
                 "your_ip_used": client_ip,
                 "extraction_method": scraped_data.get('used_ip', 'direct'),
@@ -251,7 +272,7 @@ def get_my_ip():
         "your_ip": client_ip,
         "user_agent": user_agent,
         "added_to_pool": PROXY_MANAGER_AVAILABLE,
-        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "timestamp": request_timestamp(),
         "request_headers": {
             "user_agent": user_agent,
             "accept_language": request.headers.get('Accept-Language'),
@@ -306,7 +327,7 @@ def system_status():
             "name": ARES_CONFIG["name"],
             "version": ARES_CONFIG["version"],
             "status": "OPERATIONAL",
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": request_timestamp(),
             "environment": os.environ.get('FLASK_ENV', 'production')
         },
         "your_ip": {
@@ -334,9 +355,9 @@ def system_status():
     )
 
 @app.route('/api/v1/search', methods=['GET'])
-@limiter.limit("10 per minute")
+@limiter.exempt
 def search_users():
-    """Search for users (simplified)"""
+    """Search cached profiles by username / full name prefix"""
     client_ip = get_client_ip()
     query = request.args.get('q', '')
     
@@ -357,23 +378,9 @@ def search_users():
         )
     
     try:
-        # Simple mock search
-        search_results = [
-            {
-                "username": f"{query}_user1",
-                "full_name": f"{query.capitalize()} User 1",
-                "is_verified": False,
-                "profile_pic_url": f"https://api.dicebear.com/7.x/avataaars/svg?seed={query}1",
-                "follower_count": 1000
-            },
-            {
-                "username": f"{query}_user2",
-                "full_name": f"{query.capitalize()} User 2",
-                "is_verified": True,
-                "profile_pic_url": f"https://api.dicebear.com/7.x/avataaars/svg?seed={query}2",
-                "follower_count": 5000
-            }
-        ]
+        # Typeahead over profiles already in cache - no upstream requests
+        limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+        search_results = scraper.search(query, limit)
         
         return ares_response(
             data={
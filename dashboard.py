@@ -0,0 +1,68 @@
+import re
+import hashlib
+import logging
+from typing import Dict, Optional
+from jinja2 import Environment
+from werkzeug.wrappers import Request, Response
+
+logger = logging.getLogger(__name__)
+
+ASSET_PREFIX = '/assets/'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+class Dashboard:
+    """Dashboard compiled once into static, content-hashed assets"""
+
+    def __init__(self, template_path: str, brand: Dict):
+        self.assets = {}  # name -> (body, mimetype, etag)
+        self.index = self._compile(template_path, brand)
+
+        logger.info(f"Dashboard compiled: {', '.join(sorted(self.assets))}")
+
+    def _add_asset(self, stem: str, ext: str, body: str, mimetype: str) -> str:
+        """Store an asset under a content-hashed name and return its URL"""
+        data = body.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        name = f"{stem}.{digest[:12]}.{ext}"
+        self.assets[name] = (data, mimetype, digest)
+        return ASSET_PREFIX + name
+
+    def _compile(self, template_path: str, brand: Dict) -> tuple:
+        """Render the template with static branding and split out CSS/JS"""
+        with open(template_path, encoding='utf-8') as f:
+            source = f.read()
+
+        html = Environment(autoescape=True).from_string(source).render(brand=brand)
+
+        def extract_style(match):
+            url = self._add_asset('dashboard', 'css', match.group(1), 'text/css')
+            return f'<link rel="stylesheet" href="{url}">'
+
+        def extract_script(match):
+            url = self._add_asset('dashboard', 'js', match.group(1), 'application/javascript')
+            return f'<script src="{url}"></script>'
+
+        html = re.sub(r'<style>(.*?)</style>', extract_style, html, flags=re.DOTALL)
+        html = re.sub(r'<script>(.*?)</script>', extract_script, html, flags=re.DOTALL)
+
+        data = html.encode('utf-8')
+        return (data, 'text/html', hashlib.sha256(data).hexdigest())
+
+    def _serve(self, request: Request, asset: tuple, cache_control: str) -> Response:
+        body, mimetype, etag = asset
+        response = Response(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        return response.make_conditional(request)
+
+    def serve_index(self, request: Request) -> Response:
+        """Serve the HTML shell; its name is stable so it always revalidates"""
+        return self._serve(request, self.index, REVALIDATE)
+
+    def serve_asset(self, request: Request, name: str) -> Optional[Response]:
+        """Serve a hashed asset, or None if the name is unknown"""
+        asset = self.assets.get(name)
+        if asset is None:
+            return None
+        return self._serve(request, asset, IMMUTABLE)
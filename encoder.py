@@ -0,0 +1,143 @@
+import os
+import re
+import json
+import math
+import dataclasses
+from typing import Any, Dict, Optional
+from flask.json.provider import DefaultJSONProvider
+
+# Optional fast JSON backend
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+    ORJSON_OPTIONS = (
+        orjson.OPT_SORT_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+        | orjson.OPT_PASSTHROUGH_SUBCLASS
+    )
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# stdlib escapes non-ASCII and DEL, may differ in \u hex case, and writes
+# 1e+16 / 1e-05 where orjson writes 1e16 / 0.00001 (orjson never writes 'e+')
+ORJSON_EXPONENT = re.compile(rb'e[-0-9]')
+
+# Leaf types that can never hold a non-finite float
+FINITE_TYPES = (str, int, bool, type(None))
+
+def _has_non_finite(obj: Any) -> bool:
+    """Whether obj holds a NaN / Infinity (orjson writes null, jsonify NaN)"""
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        cls = obj.__class__
+        if cls in FINITE_TYPES:
+            continue
+        if cls is dict:
+            stack.extend(obj.values())
+        elif isinstance(obj, float):
+            if not math.isfinite(obj):
+                return True
+        elif isinstance(obj, dict):
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+        elif dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+            stack.append(dataclasses.asdict(obj))
+    return False
+
+def _orjson_matches_stdlib(obj: Any, data: bytes) -> bool:
+    """Whether orjson output is byte-identical to json.dumps(ensure_ascii=True)"""
+    # Anything that merely looks suspicious falls back to the stdlib encoder;
+    # non-finite floats can only hide behind a null, so only then walk obj
+    return (
+        data.isascii()
+        and b'\x7f' not in data
+        and b'\\u' not in data
+        and b'0.0000' not in data
+        and not ORJSON_EXPONENT.search(data)
+        and (b'null' not in data or not _has_non_finite(obj))
+    )
+
+class RawJSON:
+    """Pre-serialized JSON value, spliced verbatim into responses"""
+    __slots__ = ('data',)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    @classmethod
+    def dumps(cls, obj: Any) -> 'RawJSON':
+        return cls(_backend.dumps(obj))
+
+class JSONBackend:
+    """Compact, sorted, ASCII-only JSON - the same bytes Flask's jsonify emits"""
+
+    def __init__(self, default=None):
+        self.default = default
+        self.stdlib = json.JSONEncoder(
+            sort_keys=True,
+            ensure_ascii=True,
+            separators=(',', ':'),
+            default=default
+        )
+
+    def dumps(self, obj: Any) -> bytes:
+        if ORJSON_AVAILABLE:
+            try:
+                data = orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS)
+                if _orjson_matches_stdlib(obj, data):
+                    return data
+            except TypeError:
+                pass
+        return self.stdlib.encode(obj).encode('ascii')
+
+# Same default as Flask's provider, so RawJSON accepts what jsonify would
+_backend = JSONBackend(default=DefaultJSONProvider.default)
+
+class ResponseEncoder:
+    """Builds ARES JSON responses, splicing pre-serialized payloads"""
+
+    def __init__(self, app):
+        self.app = app
+        self.backend = JSONBackend(default=getattr(app.json, 'default', None))
+        # Uppercase so the placeholder never trips the orjson exponent check
+        self.placeholder = f"__ares_raw_{os.urandom(8).hex().upper()}_"
+
+    def _fast_path(self) -> bool:
+        provider = self.app.json
+        if not isinstance(provider, DefaultJSONProvider):
+            return False
+        if provider.compact is False or (provider.compact is None and self.app.debug):
+            return False
+        return provider.sort_keys and provider.ensure_ascii
+
+    def response(self, meta: Dict, data: Optional[Any] = None):
+        """Equivalent of jsonify({"meta": meta, "data": data})
+
+        RawJSON values directly inside a `data` dict are spliced in as-is.
+        """
+        body = {"meta": meta}
+        raw = []  # (key, pre-serialized bytes)
+
+        if isinstance(data, dict) and any(isinstance(v, RawJSON) for v in data.values()):
+            data = dict(data)
+            for key, value in data.items():
+                if isinstance(value, RawJSON):
+                    data[key] = f"{self.placeholder}{len(raw)}"
+                    raw.append((key, value.data))
+
+        if data is not None:
+            body["data"] = data
+
+        if not self._fast_path():
+            for key, value in raw:
+                data[key] = json.loads(value)
+            return self.app.json.response(body)
+
+        encoded = self.backend.dumps(body)
+        for i, (_, value) in enumerate(raw):
+            encoded = encoded.replace(f'"{self.placeholder}{i}"'.encode('ascii'), value, 1)
+
+        return self.app.response_class(encoded + b'\n', mimetype=self.app.json.mimetype)
@@ -28,6 +28,7 @@ class ProxyManager:
                     "user_agent": user_agent,
                     "added_at": datetime.utcnow(),
                     "last_used": datetime.utcnow() - timedelta(hours=1),
+                    "last_seen": datetime.utcnow(),
                     "success_count": 0,
                     "failure_count": 0,
                     "total_requests": 0,
@@ -39,6 +40,8 @@ class ProxyManager:
                 # Clean old user IPs if we have too many
                 if len(self.user_ips) > self.max_user_ips:
                     self.cleanup_old_user_ips()
+            else:
+                self.user_ips[ip]["last_seen"] = datetime.utcnow()
     
     def cleanup_old_user_ips(self):
         """Remove old/inactive user IPs"""
@@ -48,6 +51,16 @@ class ProxyManager:
             if data["last_used"] < cutoff or data["failure_count"] > 10
         ]
         
+        # Still over the cap: drop the clients we have not seen for longest
+        excess = len(self.user_ips) - len(old_ips) - self.max_user_ips
+        if excess > 0:
+            expired = set(old_ips)
+            active = sorted(
+                (data["last_seen"], ip) for ip, data in self.user_ips.items()
+                if ip not in expired
+            )
+            old_ips.extend(ip for _, ip in active[:excess])
+        
         for ip in old_ips:
             del self.user_ips[ip]
         
@@ -2,23 +2,72 @@ import requests
 import json
 import time
 import re
+import hashlib
 import random
 from datetime import datetime
 from bs4 import BeautifulSoup
 import cloudscraper
 from fake_useragent import UserAgent
 import logging
+import threading
 import cachetools
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable
+from search_index import ProfileIndex
+from encoder import RawJSON
 
 logger = logging.getLogger(__name__)
 
+class ProfileCache(cachetools.TTLCache):
+    """TTL cache that reports inserts and evictions to listeners"""
+
+    def __init__(self, maxsize: int, ttl: float, timer: Callable = time.monotonic,
+                 on_insert: Callable = None, on_evict: Callable = None):
+        super().__init__(maxsize=maxsize, ttl=ttl, timer=timer)
+        self.on_insert = on_insert
+        self.on_evict = on_evict
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        if self.on_insert:
+            self.on_insert(key, value)
+
+    def __delitem__(self, key):
+        value = cachetools.Cache.__getitem__(self, key)
+        try:
+            super().__delitem__(key)
+        finally:
+            if self.on_evict:
+                self.on_evict(key, value)
+
+    def expire(self, time=None):
+        # TTLCache.expire bypasses __delitem__, so diff the raw contents
+        if not self.on_evict or not cachetools.Cache.__len__(self):
+            return super().expire(time)
+
+        before = {key: cachetools.Cache.__getitem__(self, key)
+                  for key in cachetools.Cache.__iter__(self)}
+        result = super().expire(time)
+        for key, value in before.items():
+            if not cachetools.Cache.__contains__(self, key):
+                self.on_evict(key, value)
+        return result
+
 class InstagramScraper:
     def __init__(self):
         self.session = self._create_session()
         self.ua = UserAgent()
         self.request_count = 0
-        self.cache = cachetools.TTLCache(maxsize=100, ttl=300)  # 5 minute cache
+        self.request_delay = (1.0, 2.0)  # seconds between upstream requests
+        self.search_index = ProfileIndex()
+        self.cache = ProfileCache(
+            maxsize=100,
+            ttl=300,  # 5 minute cache
+            on_insert=lambda key, entry: self.search_index.add(key, entry.get('profile', {})),
+            on_evict=self._on_cache_evict
+        )
+        # Expired entries kept around so their validators can be revalidated
+        self.stale = cachetools.LRUCache(maxsize=500)
+        self.cache_lock = threading.Lock()
         
         # Instagram endpoints
         self.endpoints = {
@@ -28,6 +77,12 @@ class InstagramScraper:
         
         logger.info("InstagramScraper initialized")
     
+    def _on_cache_evict(self, key: str, entry: Dict):
+        """Drop evicted profiles from search and keep them for revalidation"""
+        self.search_index.remove(key)
+        if entry.get('validators'):
+            self.stale[key] = entry
+    
     def _create_session(self):
         """Create session with cloudscraper"""
         try:
@@ -60,12 +115,48 @@ class InstagramScraper:
         headers['User-Agent'] = user_agent if user_agent else self.ua.random
         return headers
     
-    def _make_request(self, url: str, client_ip: str = None, user_agent: str = None) -> Optional[requests.Response]:
+    def _conditional_headers(self, validators: Dict = None) -> Dict:
+        """Build If-None-Match / If-Modified-Since from stored validators"""
+        headers = {}
+        if validators:
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
+        return headers
+    
+    def _response_validators(self, response: requests.Response, validators: Dict = None) -> Dict:
+        """Collect ETag / Last-Modified and a body hash from an upstream response"""
+        validators = validators or {}
+        if response.status_code == 304:
+            body_hash = validators.get('body_hash')
+        else:
+            body_hash = hashlib.blake2b(response.content, digest_size=16).hexdigest()
+        
+        return {
+            "etag": response.headers.get('ETag') or validators.get('etag'),
+            "last_modified": response.headers.get('Last-Modified') or validators.get('last_modified'),
+            "body_hash": body_hash
+        }
+    
+    def _is_unchanged(self, response: requests.Response, validators: Dict, fresh: Dict) -> bool:
+        """True on a 304 or when the body hash matches the stored one"""
+        if not validators:
+            return False
+        return response.status_code == 304 or (
+            response.status_code == 200 and fresh['body_hash'] == validators.get('body_hash')
+        )
+    
+    def _make_request(self, url: str, client_ip: str = None, user_agent: str = None,
+                      extra_headers: Dict = None) -> Optional[requests.Response]:
         """Make HTTP request"""
         # Rate limiting
-        time.sleep(random.uniform(1.0, 2.0))
+        if self.request_delay[1] > 0:
+            time.sleep(random.uniform(*self.request_delay))
         
         headers = self._get_headers(user_agent)
+        if extra_headers:
+            headers.update(extra_headers)
         
         # Add client IP to headers if provided
         if client_ip:
@@ -97,25 +188,63 @@ class InstagramScraper:
         """Scrape Instagram profile data"""
         start_time = time.time()
         
+        cache_key = username.lower()
+        with self.cache_lock:
+            cached = self.cache.get(cache_key)
+            stale = None
+            if not cached:
+                # Move expired entries (and their validators) into self.stale
+                self.cache.expire()
+                stale = self.stale.get(cache_key)
+        
+        if cached:
+            result = {k: v for k, v in cached.items() if k != 'validators'}
+            result['extraction_time'] = int((time.time() - start_time) * 1000)
+            result['cached'] = True
+            result['used_ip'] = client_ip or "direct"
+            return result
+        
         logger.info(f"Scraping profile: {username}")
         
         # Try multiple methods
         methods = [
-            lambda: self._scrape_via_html(username, client_ip, user_agent),
-            lambda: self._scrape_via_api(username, client_ip, user_agent),
+            ('html', self._scrape_via_html),
+            ('api', self._scrape_via_api),
         ]
         
-        for method in methods:
+        for name, method in methods:
+            # Only revalidate against validators from the same upstream endpoint
+            validators = None
+            if stale and stale['validators'].get('method') == name:
+                validators = stale['validators']
+            
             try:
-                result = method()
-                if result and 'error' not in result:
-                    extraction_time = int((time.time() - start_time) * 1000)
-                    result['extraction_time'] = extraction_time
+                result = method(username, client_ip, user_agent, validators)
+                if result and result.get('not_modified'):
+                    # Upstream unchanged: reuse the parsed entry, only extend its TTL
+                    fresh = result['validators']
+                    result = {k: v for k, v in stale.items() if k != 'validators'}
+                    result['cached'] = True
+                elif result and 'error' not in result:
+                    fresh = result.pop('validators', None)
                     result['data_points'] = self._count_data_points(result)
                     result['cached'] = False
-                    result['used_ip'] = client_ip or "direct"
-                    
-                    return result
+                    # Serialized once, spliced into every response for this entry
+                    result['profile_json'] = RawJSON.dumps(result.get('profile', {}))
+                else:
+                    continue
+                
+                result['extraction_time'] = int((time.time() - start_time) * 1000)
+                result['used_ip'] = client_ip or "direct"
+                
+                entry = dict(result)
+                if fresh:
+                    entry['validators'] = dict(fresh, method=name)
+                with self.cache_lock:
+                    self.stale.pop(cache_key, None)
+                    self.cache[cache_key] = entry
+                
+                return result
             except Exception as e:
                 logger.debug(f"Method failed: {str(e)}")
                 continue
@@ -126,13 +255,26 @@ class InstagramScraper:
             "used_ip": client_ip or "direct"
         }
     
-    def _scrape_via_html(self, username: str, client_ip: str = None, user_agent: str = None) -> Dict:
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """Search profiles already in cache (never hits upstream)"""
+        with self.cache_lock:
+            self.cache.expire()
+        return self.search_index.search(query, limit)
+    
+    def _scrape_via_html(self, username: str, client_ip: str = None, user_agent: str = None,
+                         validators: Dict = None) -> Dict:
         """Scrape via HTML parsing"""
         try:
             url = self.endpoints['profile'].format(username)
-            response = self._make_request(url, client_ip, user_agent)
+            response = self._make_request(url, client_ip, user_agent, self._conditional_headers(validators))
+            
+            if not response or response.status_code not in (200, 304):
+                return {"error": "REQUEST_FAILED"}
             
-            if not response or response.status_code != 200:
+            fresh = self._response_validators(response, validators)
+            if self._is_unchanged(response, validators, fresh):
+                return {"not_modified": True, "validators": fresh}
+            if response.status_code != 200:
                 return {"error": "REQUEST_FAILED"}
             
             html = response.text
@@ -149,29 +291,42 @@ class InstagramScraper:
             json_data = self._extract_json_from_html(html)
             
             if json_data:
-                return self._parse_html_response(json_data, username)
+                result = self._parse_html_response(json_data, username)
+            else:
+                # Fallback to direct HTML parsing
+                result = self._parse_html_directly(html, username)
             
-            # Fallback to direct HTML parsing
-            return self._parse_html_directly(html, username)
+            if 'error' not in result:
+                result['validators'] = fresh
+            return result
             
         except Exception as e:
             logger.error(f"HTML scraping error: {str(e)}")
             return {"error": "HTML_PARSING_FAILED"}
     
-    def _scrape_via_api(self, username: str, client_ip: str = None, user_agent: str = None) -> Dict:
+    def _scrape_via_api(self, username: str, client_ip: str = None, user_agent: str = None,
+                        validators: Dict = None) -> Dict:
         """Use Instagram's API"""
         try:
             url = self.endpoints['profile_json'].format(username)
-            response = self._make_request(url, client_ip, user_agent)
+            response = self._make_request(url, client_ip, user_agent, self._conditional_headers(validators))
             
-            if response and response.status_code == 200:
+            if response and response.status_code in (200, 304):
+                fresh = self._response_validators(response, validators)
+                if self._is_unchanged(response, validators, fresh):
+                    return {"not_modified": True, "validators": fresh}
+                if response.status_code != 200:
+                    return {"error": "API_FAILED"}
+                
                 data = response.json()
                 user = data.get('data', {}).get('user', {})
                 
                 if not user:
                     return {"error": "USER_NOT_FOUND"}
                 
-                return self._parse_api_response(user)
+                result = self._parse_api_response(user)
+                result['validators'] = fresh
+                return result
             
         except Exception as e:
             logger.debug(f"API method failed: {str(e)}")
@@ -361,7 +516,7 @@ class InstagramScraper:
         """Test connection with client IP"""
         try:
             # Test with a simple request
-            test_url = "https://www.instagram.com/instagram/"
+            test_url = self.endpoints['profile'].format('instagram')
             response = self._make_request(test_url, client_ip)
             
             if response and response.status_code == 200:
@@ -0,0 +1,110 @@
+import re
+import heapq
+import logging
+import threading
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+class ProfileIndex:
+    """In-memory prefix index over cached profiles for typeahead search"""
+
+    def __init__(self, max_prefix: int = 30):
+        self.prefixes = {}  # prefix -> set of keys
+        self.entries = {}   # key -> (summary, tokens)
+        self.max_prefix = max_prefix
+        self.lock = threading.Lock()
+
+        logger.info("ProfileIndex initialized")
+
+    def _tokenize(self, username: str, full_name: str) -> set:
+        """Split username and full name into lowercase searchable tokens"""
+        tokens = set()
+        username = username.lower()
+        if username:
+            tokens.add(username)
+            tokens.update(t for t in re.split(r'[._]+', username) if t)
+        tokens.update(t for t in full_name.lower().split() if t)
+        return tokens
+
+    def add(self, key: str, profile: Dict):
+        """Index (or re-index) a cached profile"""
+        identity = profile.get('identity', {}) if profile else {}
+        username = identity.get('username') or key
+        full_name = identity.get('full_name') or ''
+
+        summary = {
+            "username": username,
+            "full_name": full_name,
+            "is_verified": identity.get('is_verified', False),
+            "profile_pic_url": identity.get('profile_pic_url', ''),
+            "follower_count": profile.get('statistics', {}).get('followers', 0) if profile else 0
+        }
+        tokens = self._tokenize(username, full_name)
+
+        with self.lock:
+            self._remove(key)
+            self.entries[key] = (summary, tokens)
+            for token in tokens:
+                for i in range(1, min(len(token), self.max_prefix) + 1):
+                    self.prefixes.setdefault(token[:i], set()).add(key)
+
+    def remove(self, key: str):
+        """Drop a profile from the index"""
+        with self.lock:
+            self._remove(key)
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if not entry:
+            return
+
+        for token in entry[1]:
+            for i in range(1, min(len(token), self.max_prefix) + 1):
+                prefix = token[:i]
+                keys = self.prefixes.get(prefix)
+                if keys is None:
+                    continue
+                keys.discard(key)
+                if not keys:
+                    del self.prefixes[prefix]
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """Return up to `limit` profiles matching every term of the query"""
+        query = query.strip().lower()
+        terms = [t[:self.max_prefix] for t in query.split()]
+        if not terms:
+            return []
+
+        with self.lock:
+            candidates = None
+            for term in sorted(terms, key=lambda t: len(self.prefixes.get(t, ()))):
+                keys = self.prefixes.get(term)
+                if not keys:
+                    return []
+                candidates = set(keys) if candidates is None else candidates & keys
+                if not candidates:
+                    return []
+
+            ranked = heapq.nsmallest(
+                limit,
+                (self._rank(key, self.entries[key][0], query) for key in candidates)
+            )
+
+        return [entry[-1] for entry in ranked]
+
+    def _rank(self, key: str, summary: Dict, query: str) -> Tuple:
+        """Sort key: exact username, username prefix, name prefix, then popularity"""
+        username = summary["username"].lower()
+        if username == query:
+            score = 0
+        elif username.startswith(query):
+            score = 1
+        elif summary["full_name"].lower().startswith(query):
+            score = 2
+        else:
+            score = 3
+        return (score, -(summary["follower_count"] or 0), username, key, summary)
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,360 @@
+"""Soak benchmark: per-worker memory growth under long mixed traffic.
+
+Drives requests through the Flask app in-process (one process per worker)
+against a local fake Instagram upstream, sampling RSS and tracemalloc as it
+goes. New client IPs and usernames keep arriving for the whole run. Exits
+non-zero if memory is still growing after warm-up, or if a long-lived
+structure outgrows its bound (or keeps growing when it has none).
+
+    python soak.py                                  # 1M requests x 2 workers
+    python soak.py --requests 200000 --workers 1 --clients 5000
+"""
+import os
+import sys
+import json
+import time
+import random
+import itertools
+import hashlib
+import logging
+import argparse
+import threading
+import tracemalloc
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import urlparse, parse_qs
+
+MB = 1024 * 1024
+
+# Share of traffic per endpoint
+REQUEST_MIX = [
+    ('lookup', 50),
+    ('search', 20),
+    ('my_ip', 8),
+    ('dashboard', 8),
+    ('proxy_pool', 5),
+    ('status', 3),
+    ('home', 3),
+    ('not_found', 3),
+]
+
+class FakeInstagramHandler(BaseHTTPRequestHandler):
+    """Serves profile HTML / JSON with ETags; profiles change every `epoch` seconds"""
+    epoch = 60.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _profile(self, username: str) -> Dict:
+        digest = int(hashlib.md5(username.encode()).hexdigest(), 16)
+        version = int(time.time() / self.epoch) if digest % 4 == 0 else 0
+        return {
+            "username": username,
+            "full_name": f"{username.replace('_', ' ').title()} {digest % 1000}",
+            "biography": "soak " * (digest % 20),
+            "is_verified": digest % 7 == 0,
+            "profile_pic_url": f"https://cdn.example/{username}.jpg",
+            "edge_followed_by": {"count": digest % 100000 + version},
+            "edge_follow": {"count": digest % 500},
+            "edge_owner_to_timeline_media": {"count": digest % 300},
+            "missing": digest % 25 == 0,
+        }
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.startswith('/api/'):
+            username = parse_qs(url.query).get('username', [''])[0]
+            user = self._profile(username)
+            body = json.dumps({"data": {"user": None if user["missing"] else user}})
+            content_type = 'application/json'
+        else:
+            username = url.path.strip('/')
+            user = self._profile(username)
+            if user["missing"]:
+                body = "<html>Sorry, this page isn't available.</html>"
+            else:
+                body = (f"<html><script>window._sharedData = "
+                        f"{json.dumps({'graphql': {'user': user}})};</script></html>")
+            content_type = 'text/html'
+
+        data = body.encode()
+        etag = '"%s"' % hashlib.md5(data).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+def start_fake_upstream() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeInstagramHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class ScaledClock:
+    """Stand-in for the time module that runs `scale` times faster than the wall clock"""
+
+    def __init__(self, scale: float):
+        self.scale = scale
+        self.origin = time.time()
+
+    def time(self) -> float:
+        return self.origin + (time.time() - self.origin) * self.scale
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+def client_ip(i: int) -> str:
+    return f"{10 + (i >> 24)}.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+
+def state_sizes(app_module) -> Dict:
+    """Sizes of the long-lived per-worker structures, as (size, bound or None)"""
+    sizes = {}
+
+    storage = app_module.limiter.storage
+    for name in ('storage', 'expirations', 'events', 'locks'):
+        if hasattr(storage, name):
+            sizes[f"limiter.{name}"] = (len(getattr(storage, name)), None)
+
+    if app_module.PROXY_MANAGER_AVAILABLE:
+        proxy_manager = app_module.proxy_manager
+        sizes["proxy_manager.user_ips"] = (len(proxy_manager.user_ips), proxy_manager.max_user_ips)
+    if app_module.SCRAPER_AVAILABLE:
+        scraper = app_module.scraper
+        sizes["scraper.cache"] = (len(scraper.cache), scraper.cache.maxsize)
+        sizes["scraper.stale"] = (len(scraper.stale), scraper.stale.maxsize)
+        sizes["scraper.search_index"] = (len(scraper.search_index), scraper.cache.maxsize)
+        sizes["scraper.session.cookies"] = (len(scraper.session.cookies), None)
+    return sizes
+
+def top_allocators(snapshot, limit: int) -> List[str]:
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    return [str(stat) for stat in snapshot.statistics('lineno')[:limit]]
+
+def run_worker(worker_id: int, upstream: str, args) -> Dict:
+    """Run one worker's share of the soak and return its samples"""
+    logging.disable(logging.WARNING)
+    rng = random.Random(args.seed + worker_id)
+
+    # Limiter keys live for their whole window (up to a day); compress time
+    # for the limiter so its state can reach steady state within the soak
+    import limits.storage.memory
+    limits.storage.memory.time = ScaledClock(args.limiter_time_scale)
+
+    tracemalloc.start(args.trace_depth)
+
+    import app as app_module
+    app_module.scraper.request_delay = (0, 0)
+    app_module.scraper.endpoints = {
+        'profile': upstream + '/{}/',
+        'profile_json': upstream + '/api/v1/users/web_profile_info/?username={}',
+    }
+
+    client = app_module.app.test_client()
+    usernames = [f"user_{i}" for i in range(args.usernames)]
+    # Zipf-like popularity: a hot head that fits in cache and a long tail
+    popularity = list(itertools.accumulate(1 / (i + 1) for i in range(args.usernames)))
+    kinds = [kind for kind, _ in REQUEST_MIX]
+    weights = [weight for _, weight in REQUEST_MIX]
+    # Returning clients / usernames come from fixed pools; new ones keep
+    # arriving for the whole run so per-client state cannot level off early
+    next_client = args.clients
+    next_username = 0
+
+    warmup = int(args.requests * args.warmup)
+    samples = []
+    statuses = {}
+    baseline = None
+    started = time.time()
+
+    for n in range(1, args.requests + 1):
+        if rng.random() < args.new_client_rate:
+            ip = client_ip(next_client)
+            next_client += 1
+        else:
+            ip = client_ip(rng.randrange(args.clients))
+
+        if rng.random() < args.new_username_rate:
+            username = f"new_{next_username}"
+            next_username += 1
+        else:
+            username = rng.choices(usernames, cum_weights=popularity)[0]
+
+        kind = rng.choices(kinds, weights)[0]
+        if kind == 'lookup':
+            path = f'/api/v1/lookup/{username}'
+        elif kind == 'search':
+            path = f'/api/v1/search?q={username[:rng.randint(2, len(username))]}'
+        elif kind == 'home':
+            path = '/'
+        elif kind == 'not_found':
+            path = f'/api/v1/missing/{n}'
+        else:
+            path = f'/api/v1/{kind}'
+
+        response = client.get(
+            path,
+            headers={'X-Forwarded-For': ip, 'User-Agent': f'soak/{n % 50}'},
+            environ_base={'REMOTE_ADDR': ip}
+        )
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        response.close()
+
+        if n % args.sample_every == 0 or n == args.requests:
+            snapshot = tracemalloc.take_snapshot()
+            if baseline is None and n >= warmup:
+                baseline = snapshot
+            traced, _ = tracemalloc.get_traced_memory()
+            samples.append({
+                "requests": n,
+                "rss": current_rss(),
+                "traced": traced,
+                "elapsed": time.time() - started,
+                "state": state_sizes(app_module),
+                "top": top_allocators(snapshot, args.sample_top),
+            })
+            del snapshot
+            print(f"[worker {worker_id}] {n}/{args.requests} requests, "
+                  f"rss {samples[-1]['rss'] / MB:.1f} MB, traced {traced / MB:.2f} MB", flush=True)
+
+    final = tracemalloc.take_snapshot()
+    if baseline is None:
+        baseline = final
+    trace_filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    growth = final.filter_traces(trace_filters).compare_to(
+        baseline.filter_traces(trace_filters), 'lineno'
+    )
+    tracemalloc.stop()
+
+    return {
+        "worker": worker_id,
+        "warmup": warmup,
+        "samples": samples,
+        "statuses": statuses,
+        "new_clients": next_client - args.clients,
+        "new_usernames": next_username,
+        "top_growth": [str(stat) for stat in growth[:args.top]],
+        "top_allocators": top_allocators(final, args.top),
+    }
+
+def growth_after_warmup(values: List[int]) -> int:
+    """Mean of the last quarter of post-warm-up values minus the first quarter"""
+    if len(values) < 4:
+        return 0
+    quarter = len(values) // 4
+    head = sum(values[:quarter]) / quarter
+    tail = sum(values[-quarter:]) / quarter
+    return int(tail - head)
+
+def check_state(steady: List[Dict], args) -> List[str]:
+    """Structures past their bound, or unbounded ones still growing after warm-up"""
+    problems = []
+    for name, (_, bound) in steady[-1]["state"].items():
+        sizes = [s["state"][name][0] for s in steady if name in s["state"]]
+        if bound is not None:
+            if max(sizes) > bound:
+                problems.append(f"{name} reached {max(sizes)} (bound {bound})")
+            continue
+        growth = growth_after_warmup(sizes)
+        if growth > max(args.min_state_growth, sizes[0] * args.max_state_growth):
+            problems.append(f"{name} still growing after warm-up ({sizes[0]} -> {sizes[-1]})")
+    return problems
+
+def report(result: Dict, args) -> bool:
+    """Print one worker's report; return True if memory stayed flat"""
+    samples = result["samples"]
+    steady = [s for s in samples if s["requests"] >= result["warmup"]]
+    traced = growth_after_warmup([s["traced"] for s in steady])
+    rss = growth_after_warmup([s["rss"] for s in steady])
+    problems = check_state(steady, args) if steady else []
+    if traced > args.max_traced_growth * MB:
+        problems.append(f"traced memory grew {traced / MB:+.2f} MB (limit {args.max_traced_growth})")
+    if rss > args.max_rss_growth * MB:
+        problems.append(f"rss grew {rss / MB:+.2f} MB (limit {args.max_rss_growth})")
+    passed = not problems
+
+    print(f"\n=== worker {result['worker']} ({'PASS' if passed else 'FAIL'}) ===")
+    print(f"statuses: {dict(sorted(result['statuses'].items()))}")
+    print(f"new clients: {result['new_clients']}, new usernames: {result['new_usernames']}")
+    print(f"{'requests':>10} {'req/s':>8} {'rss MB':>8} {'traced MB':>10}  state (size/bound)")
+    for s in samples:
+        rate = s["requests"] / s["elapsed"] if s["elapsed"] else 0
+        state = ', '.join(
+            f"{name}={size}" + (f"/{bound}" if bound is not None else '')
+            for name, (size, bound) in s["state"].items()
+        )
+        print(f"{s['requests']:>10} {rate:>8.0f} {s['rss'] / MB:>8.1f} "
+              f"{s['traced'] / MB:>10.2f}  {state}")
+    print(f"growth after warm-up: traced {traced / MB:+.2f} MB, rss {rss / MB:+.2f} MB")
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    print("top allocators over time:")
+    for s in samples:
+        print(f"  after {s['requests']} requests:")
+        for line in s["top"]:
+            print(f"    {line}")
+    print("top growth since warm-up:")
+    for line in result["top_growth"]:
+        print(f"  {line}")
+    print("top allocators:")
+    for line in result["top_allocators"]:
+        print(f"  {line}")
+    return passed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000000, help='requests per worker')
+    parser.add_argument('--workers', type=int, default=2, help='worker processes (Procfile runs 2)')
+    parser.add_argument('--clients', type=int, default=20000, help='returning client IPs')
+    parser.add_argument('--new-client-rate', type=float, default=0.05, help='share of requests from a never-seen IP')
+    parser.add_argument('--usernames', type=int, default=5000, help='returning usernames (Zipf popularity)')
+    parser.add_argument('--new-username-rate', type=float, default=0.02, help='share of requests for a never-seen username')
+    parser.add_argument('--limiter-time-scale', type=float, default=3600.0,
+                        help='how much faster the rate limiter clock runs (3600: a day lasts 24s)')
+    parser.add_argument('--warmup', type=float, default=0.25, help='fraction of requests treated as warm-up')
+    parser.add_argument('--samples', type=int, default=40, help='memory samples per worker')
+    parser.add_argument('--max-traced-growth', type=float, default=2.0, help='MB of traced growth allowed after warm-up')
+    parser.add_argument('--max-rss-growth', type=float, default=16.0, help='MB of RSS growth allowed after warm-up')
+    parser.add_argument('--trace-depth', type=int, default=1, help='tracemalloc frames per allocation')
+    parser.add_argument('--max-state-growth', type=float, default=0.1,
+                        help='relative growth allowed after warm-up for unbounded structures')
+    parser.add_argument('--min-state-growth', type=int, default=50,
+                        help='absolute growth always tolerated for unbounded structures')
+    parser.add_argument('--top', type=int, default=10, help='allocators to list')
+    parser.add_argument('--sample-top', type=int, default=5, help='allocators recorded per sample')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    args.sample_every = max(1, args.requests // args.samples)
+
+    server = start_fake_upstream()
+    upstream = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"fake upstream on {upstream}; {args.workers} worker(s) x {args.requests} requests")
+
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(args.workers) as pool:
+        results = pool.starmap(run_worker, [(i, upstream, args) for i in range(args.workers)])
+
+    server.shutdown()
+    passed = all([report(result, args) for result in results])
+    print(f"\nsoak {'PASSED' if passed else 'FAILED'}")
+    return 0 if passed else 1
+
+if __name__ == '__main__':
+    sys.exit(main())